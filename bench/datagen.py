@@ -0,0 +1,153 @@
+"""
+Generate synthetic /data fixtures for the benchmarks.
+
+    python -m bench.datagen --root /data --scale small
+
+Writes every input the deterministic tools read, plus <root>/bench-manifest.json listing one
+task per tool: the task text sent to /run and the tool call the stub LLM answers with.
+Scales go from a few KB (small) to several GB (huge) for the line-oriented fixtures.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+from itertools import chain
+
+from faker import Faker
+
+SCALES = {"small": 1, "medium": 100, "large": 10_000, "huge": 100_000}
+
+# Row counts at scale 1. Quadratic or per-item-HTTP fixtures are capped separately.
+BASE_COUNTS = {"dates": 1_000, "contacts": 100, "logs": 20, "log_lines": 50, "docs": 20, "comments": 20, "tickets": 1_000, "csv": 1_000}
+CAPS = {"contacts": 1_000_000, "logs": 10_000, "docs": 10_000, "comments": 500}
+
+DATE_FORMATS = ["%Y-%m-%d", "%d-%b-%Y", "%b %d, %Y", "%Y/%m/%d %H:%M:%S"]
+
+
+def count(name: str, scale: int) -> int:
+    return min(BASE_COUNTS[name] * scale, CAPS.get(name, float("inf")))
+
+
+def write_lines(path: str, lines, batch: int = 10_000):
+    with open(path, "w") as f:
+        buffer = []
+        for line in lines:
+            buffer.append(line)
+            if len(buffer) >= batch:
+                f.write("\n".join(buffer) + "\n")
+                buffer.clear()
+        if buffer:
+            f.write("\n".join(buffer) + "\n")
+
+
+def generate(root: str, scale: int, stub_url: str = "http://127.0.0.1:8001", seed: int = 0) -> list:
+    fake = Faker()
+    Faker.seed(seed)
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    # Faker is slow per call, so large files sample from a pool of pre-generated values.
+    pool_dates = [fake.date_time_between("-20y", "now") for _ in range(2_000)]
+    pool_names = [(fake.first_name(), fake.last_name()) for _ in range(2_000)]
+    pool_sentences = [fake.sentence() for _ in range(2_000)]
+    pool_cities = [fake.city() for _ in range(200)]
+
+    write_lines(f"{root}/dates.txt", (rng.choice(pool_dates).strftime(rng.choice(DATE_FORMATS)) for _ in range(count("dates", scale))))
+
+    with open(f"{root}/contacts.json", "w") as f:
+        contacts = []
+        for _ in range(count("contacts", scale)):
+            first, last = rng.choice(pool_names)
+            contacts.append({"first_name": first, "last_name": last, "email": f"{first}.{last}@example.com".lower()})
+        json.dump(contacts, f)
+
+    os.makedirs(f"{root}/logs", exist_ok=True)
+    for i in range(count("logs", scale)):
+        write_lines(f"{root}/logs/log-{i}.log", (f"{rng.choice(pool_dates).isoformat()} INFO {rng.choice(pool_sentences)}" for _ in range(BASE_COUNTS["log_lines"])))
+
+    for i in range(count("docs", scale)):
+        doc_dir = f"{root}/docs/{fake.word()}"
+        os.makedirs(doc_dir, exist_ok=True)
+        write_lines(f"{doc_dir}/doc-{i}.md", [f"# {rng.choice(pool_sentences)}", "", *rng.sample(pool_sentences, 5)])
+
+    with open(f"{root}/email.txt", "w") as f:
+        f.write(f"From: {fake.name()} <{fake.email()}>\nTo: {fake.email()}\nSubject: {fake.sentence()}\n\n{fake.paragraph()}\n")
+
+    write_lines(f"{root}/comments.txt", (rng.choice(pool_sentences) for _ in range(count("comments", scale))))
+
+    if os.path.exists(f"{root}/ticket-sales.db"):
+        os.remove(f"{root}/ticket-sales.db")
+    conn = sqlite3.connect(f"{root}/ticket-sales.db")
+    conn.execute("CREATE TABLE tickets (type TEXT, units INTEGER, price REAL)")
+    ticket_types = ["Gold", "Silver", "Bronze"]
+    remaining = count("tickets", scale)
+    while remaining > 0:
+        rows = [(rng.choice(ticket_types), rng.randint(1, 10), round(rng.uniform(10, 500), 2)) for _ in range(min(remaining, 100_000))]
+        conn.executemany("INSERT INTO tickets VALUES (?, ?, ?)", rows)
+        remaining -= len(rows)
+    conn.commit()
+    conn.close()
+
+    write_lines(f"{root}/data.csv", chain(["name,city,department,salary"], (
+        f"{first} {last},{rng.choice(pool_cities)},{rng.choice(['Sales', 'IT', 'HR'])},{rng.randint(30_000, 200_000)}"
+        for first, last in (rng.choice(pool_names) for _ in range(count("csv", scale)))
+    )))
+
+    with open(f"{root}/format.md", "w") as f:
+        f.write("\n\n".join(f"## {sentence}\n\n{' '.join(rng.sample(pool_sentences, 8))}" for sentence in rng.sample(pool_sentences, min(50 * scale, 2_000))))
+
+    from PIL import Image
+    side = min(256 * scale, 8_192)
+    Image.frombytes("RGB", (side, side), rng.randbytes(side * side * 3)).save(f"{root}/image.png")
+    Image.new("RGB", (400, 100), "white").save(f"{root}/credit-card.png")
+
+    with open(f"{root}/audio.mp3", "wb") as f:
+        f.write(rng.randbytes(64 * 1024 * min(scale, 100)))
+
+    manifest = [
+        {"task": f"Count the Wednesdays in {root}/dates.txt and write the count to {root}/dates-wednesdays.txt", "name": "A3",
+         "arguments": {"filename": f"{root}/dates.txt", "targetfile": f"{root}/dates-wednesdays.txt", "weekday": 3}},
+        {"task": f"Sort {root}/contacts.json by last name then first name into {root}/contacts-sorted.json", "name": "A4",
+         "arguments": {"filename": f"{root}/contacts.json", "targetfile": f"{root}/contacts-sorted.json"}},
+        {"task": f"Write the first line of the 10 most recent logs in {root}/logs to {root}/logs-recent.txt", "name": "A5",
+         "arguments": {"log_dir_path": f"{root}/logs", "output_dir_path": f"{root}/logs-recent.txt", "num_files": 10}},
+        {"task": f"Index the markdown titles in {root}/docs into {root}/docs/index.json", "name": "A6",
+         "arguments": {"doc_dir_path": f"{root}/docs", "output_file_path": f"{root}/docs/index.json"}},
+        {"task": f"Extract the sender of {root}/email.txt into {root}/email-sender.txt", "name": "A7",
+         "arguments": {"filename": f"{root}/email.txt", "output_file": f"{root}/email-sender.txt"}},
+        {"task": f"Read the card number from {root}/credit-card.png into {root}/credit-card.txt", "name": "A8",
+         "arguments": {"filename": f"{root}/credit-card.txt", "image_path": f"{root}/credit-card.png"}},
+        {"task": f"Find the two most similar comments in {root}/comments.txt and write them to {root}/comments-similar.txt", "name": "A9",
+         "arguments": {"filename": f"{root}/comments.txt", "output_filename": f"{root}/comments-similar.txt"}},
+        {"task": f"Total the Gold ticket sales in {root}/ticket-sales.db into {root}/ticket-sales-gold.txt", "name": "A10",
+         "arguments": {"filename": f"{root}/ticket-sales.db", "output_filename": f"{root}/ticket-sales-gold.txt",
+                       "query": "SELECT SUM(units * price) FROM tickets WHERE type = 'Gold'"}},
+        {"task": f"Fetch the bench API JSON into {root}/api.json", "name": "B3",
+         "arguments": {"api_url": f"{stub_url}/bench/api.json", "output": f"{root}/api.json"}},
+        {"task": f"Run a SQL count of tickets by type on {root}/ticket-sales.db into {root}/ticket-counts.json", "name": "B5",
+         "arguments": {"input": f"{root}/ticket-sales.db", "query": "SELECT type, COUNT(*) AS n FROM tickets GROUP BY type", "output": f"{root}/ticket-counts.json"}},
+        {"task": f"Scrape the bench page into {root}/page.json", "name": "B6",
+         "arguments": {"url": f"{stub_url}/bench/page.html", "output": f"{root}/page.json"}},
+        {"task": f"Resize {root}/image.png to half size into {root}/image-small.png", "name": "B7",
+         "arguments": {"input": f"{root}/image.png", "output": f"{root}/image-small.png"}},
+        {"task": f"Transcribe {root}/audio.mp3 into {root}/audio.txt", "name": "B8",
+         "arguments": {"input": f"{root}/audio.mp3", "output": f"{root}/audio.txt"}},
+        {"task": f"Convert {root}/format.md to HTML at {root}/format.html", "name": "B9",
+         "arguments": {"input": f"{root}/format.md", "output": f"{root}/format.html"}},
+        {"task": f"Filter {root}/data.csv where department is IT", "name": "B10",
+         "arguments": {"csv_path": f"{root}/data.csv", "filter_column": "department", "filter_value": "IT"}},
+    ]
+    with open(f"{root}/bench-manifest.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic /data fixtures for benchmarking.")
+    parser.add_argument("--root", default="/data")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--stub-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    manifest = generate(args.root, SCALES[args.scale], args.stub_url, args.seed)
+    print(f"Wrote {len(manifest)} tasks to {args.root}/bench-manifest.json")
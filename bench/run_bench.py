@@ -0,0 +1,214 @@
+"""
+Offline benchmarks for every task_* tool and for the full /run path.
+
+    python -m bench.run_bench --root /data --scale small --generate --output bench_output.json
+
+Starts the local aiproxy stub, runs each tool from the manifest in a fresh process (so peak
+RSS is per tool), then starts the API with uvicorn and drives /run with concurrent clients.
+Results are written as JSON: p50/p99/mean latency in ms, throughput per second and peak RSS
+in bytes for each tool and for /run, so runs can be diffed.
+
+A1, A2 and B4 are not benchmarked: they shell out to uv, npx/prettier and git against
+remote repositories, so they cannot run offline.
+
+The /run load test sends the manifest tasks repeatedly. Coalescing and memoization are off
+unless --coalesce / --memo are given, and --vary-tasks makes every task string unique so
+parse results cannot be shared either.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import httpx
+
+from bench import datagen
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def summarize(latencies: list, wall: float, peak_rss: int, errors: int = 0) -> dict:
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+        "throughput_per_s": len(latencies) / wall if wall else 0.0,
+        "peak_rss_bytes": peak_rss,
+    }
+
+
+def _tool_worker(code: str, arguments: dict, iterations: int, env: dict) -> dict:
+    os.environ.update(env)
+    sys.path.insert(0, REPO_ROOT)
+    import functions
+    task = getattr(functions, f"task_{code}")
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        begin = time.perf_counter()
+        try:
+            task(dict(arguments))
+            latencies.append(time.perf_counter() - begin)
+        except Exception:
+            errors += 1
+    wall = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux.
+    return summarize(latencies, wall, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024, errors)
+
+
+def bench_tools(manifest: list, iterations: int, env: dict, only: list = None) -> dict:
+    results = {}
+    for entry in manifest:
+        if only and entry["name"] not in only:
+            continue
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            results[entry["name"]] = pool.submit(_tool_worker, entry["name"], entry["arguments"], iterations, env).result()
+        print(f"{entry['name']}: {results[entry['name']]}", file=sys.stderr)
+    return results
+
+
+def start_server(command: list, env: dict, url: str, timeout: float = 30.0) -> subprocess.Popen:
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env={**os.environ, **env})
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{' '.join(command)} did not come up at {url}")
+
+
+def peak_rss_of(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+async def drive_run(base_url: str, tasks: list, total: int, concurrency: int, vary_tasks: bool = False):
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def client_loop(client):
+        nonlocal errors
+        for i in counter:
+            begin = time.perf_counter()
+            try:
+                task = tasks[i % len(tasks)]
+                if vary_tasks:
+                    # The stub matches manifest tasks by substring, so a suffix keeps routing intact.
+                    task = f"{task} (request {i})"
+                response = await client.post(f"{base_url}/run", params={"task": task})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - begin)
+            except httpx.HTTPError:
+                errors += 1
+
+    start = time.perf_counter()
+    async with httpx.AsyncClient(timeout=300) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def bench_run(manifest: list, port: int, total: int, concurrency: int, env: dict, only: list = None, vary_tasks: bool = False) -> dict:
+    tasks = [entry["task"] for entry in manifest if not only or entry["name"] in only]
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"], env, f"{base_url}/stats")
+    try:
+        latencies, errors, wall = asyncio.run(drive_run(base_url, tasks, total, concurrency, vary_tasks))
+        return {"concurrency": concurrency, "vary_tasks": vary_tasks, **summarize(latencies, wall, peak_rss_of(server.pid), errors)}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the DataWorks agent offline.")
+    parser.add_argument("--root", default="/data")
+    parser.add_argument("--scale", choices=datagen.SCALES, default="small")
+    parser.add_argument("--generate", action="store_true", help="Generate fixtures before benchmarking.")
+    parser.add_argument("--tools", nargs="*", help="Only benchmark these tool codes.")
+    parser.add_argument("--iterations", type=int, default=5, help="Runs per tool.")
+    parser.add_argument("--requests", type=int, default=200, help="Total /run requests.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Stub LLM latency.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--memo", action="store_true", help="Keep tool memoization on for /run.")
+    parser.add_argument("--coalesce", action="store_true", help="Keep request coalescing on for /run.")
+    parser.add_argument("--vary-tasks", action="store_true", help="Make every /run task string unique.")
+    parser.add_argument("--skip-run", action="store_true", help="Only benchmark the tools directly.")
+    parser.add_argument("--stub-port", type=int, default=8001)
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--output", help="Write JSON results here instead of stdout.")
+    args = parser.parse_args()
+
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    manifest_path = f"{args.root}/bench-manifest.json"
+    if args.generate or not os.path.exists(manifest_path):
+        datagen.generate(args.root, datagen.SCALES[args.scale], stub_url)
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    env = {
+        "AIPROXY_URL": f"{stub_url}/openai/v1",
+        "AIPROXY_TOKEN": "stub",
+        "TOOL_MEMO": "1" if args.memo else "0",
+        "COALESCE": "1" if args.coalesce else "0",
+        "TOOL_MEMO_DIR": os.path.join(tempfile.gettempdir(), "dataworks-bench-memo"),
+    }
+    stub = start_server(
+        [sys.executable, "-m", "bench.stub_server", "--manifest", manifest_path, "--port", str(args.stub_port),
+         "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms)],
+        {}, f"{stub_url}/bench/api.json",
+    )
+    try:
+        report = {
+            "meta": {
+                "timestamp": time.time(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "scale": args.scale,
+                "stub_latency_ms": args.latency_ms,
+                "memo": args.memo,
+                "coalesce": args.coalesce,
+            },
+            "tools": bench_tools(manifest, args.iterations, env, args.tools),
+        }
+        if not args.skip_run:
+            report["run"] = bench_run(manifest, args.port, args.requests, args.concurrency, env, args.tools, args.vary_tasks)
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
@@ -0,0 +1,95 @@
+"""
+Local stand-in for the aiproxy OpenAI endpoints, so benchmarks never touch the network.
+
+    python -m bench.stub_server --manifest /data/bench-manifest.json --latency-ms 200
+
+Point the agent at it with AIPROXY_URL=http://127.0.0.1:8001/openai/v1. Chat completions
+answer with the tool calls from the manifest for every manifest task found in the prompt,
+in prompt order, so both /run and /run/batch work. Embeddings are deterministic per input.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse
+
+app = FastAPI(title="aiproxy stub")
+
+LATENCY_MS = 0.0
+JITTER_MS = 0.0
+MANIFEST = []
+EMBEDDING_SIZE = 256
+
+
+async def delay():
+    await asyncio.sleep(max(0.0, LATENCY_MS + random.uniform(-JITTER_MS, JITTER_MS)) / 1000)
+
+
+def completion(message: dict) -> dict:
+    return {"object": "chat.completion", "model": "stub", "choices": [{"index": 0, "message": {"role": "assistant", **message}, "finish_reason": "stop"}]}
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    await delay()
+    prompt = body["messages"][-1]["content"]
+    if not isinstance(prompt, str):
+        # Vision request from A8.
+        return completion({"content": "4111 1111 1111 1111"})
+    found = sorted((entry for entry in MANIFEST if entry["task"] in prompt), key=lambda entry: prompt.find(entry["task"]))
+    # Batch prompts number their tasks ("3. <task>") and expect the number back as task_index.
+    numbers = {task: int(number) for number, task in re.findall(r"^(\d+)\. (.*)$", prompt, re.MULTILINE)}
+    tool_calls = []
+    for i, entry in enumerate(found):
+        arguments = dict(entry["arguments"])
+        if entry["task"] in numbers:
+            arguments["task_index"] = numbers[entry["task"]]
+        tool_calls.append({"id": f"call_{i}", "type": "function", "function": {"name": entry["name"], "arguments": json.dumps(arguments)}})
+    return completion({"content": None, "tool_calls": tool_calls})
+
+
+@app.post("/openai/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    await delay()
+    data = []
+    for i, text in enumerate(body["input"]):
+        rng = random.Random(hashlib.sha256(text.encode()).digest())
+        data.append({"object": "embedding", "index": i, "embedding": [rng.uniform(-1, 1) for _ in range(EMBEDDING_SIZE)]})
+    return {"object": "list", "model": "stub", "data": data}
+
+
+@app.post("/openai/v1/audio/transcriptions")
+async def transcriptions():
+    await delay()
+    return {"text": "This is a stub transcription."}
+
+
+@app.get("/bench/api.json")
+async def bench_api():
+    return {"items": [{"id": i, "value": i * i} for i in range(100)]}
+
+
+@app.get("/bench/page.html", response_class=HTMLResponse)
+async def bench_page():
+    links = "".join(f'<a href="/item/{i}">Item {i}</a>' for i in range(100))
+    return f"<html><head><title>Bench page</title></head><body>{links}</body></html>"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the local aiproxy stub.")
+    parser.add_argument("--manifest", default="/data/bench-manifest.json")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+    LATENCY_MS, JITTER_MS = args.latency_ms, args.jitter_ms
+    with open(args.manifest) as f:
+        MANIFEST = json.load(f)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import os
+from starlette.concurrency import run_in_threadpool
+
+import functions
+import memo
+
+# COALESCE=0 turns sharing off, e.g. to benchmark the uncoalesced path.
+COALESCE_ENABLED = os.getenv("COALESCE", "1") != "0"
+
+
+class SingleFlight:
+    """
+    Share one in-flight call between concurrent callers that ask for the same key.
+    Only calls that overlap in time are coalesced; nothing is cached once a call finishes.
+    """
+
+    def __init__(self):
+        self.inflight = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn, *args):
+        if not COALESCE_ENABLED:
+            self.calls += 1
+            return await run_in_threadpool(fn, *args)
+        task = self.inflight.get(key)
+        if task is None:
+            self.calls += 1
+            # The call runs in its own task, so cancelling whichever request started it
+            # does not cancel the other requests waiting on it.
+            task = asyncio.ensure_future(run_in_threadpool(fn, *args))
+            self.inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key, task):
+        if self.inflight.get(key) is task:
+            del self.inflight[key]
+        # Mark the exception as retrieved in case every waiter was cancelled.
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "coalesced": self.coalesced, "inflight": len(self.inflight)}
+
+
+def input_stamp(tool_code: str, params: dict) -> list:
+    """
+    (path, mtime, size) for every input file of the tool, so a changed input file never
+    joins an execution that started before the change. Tools without declared inputs are
+    stamped with every argument that names an existing file.
+    """
+    if tool_code in functions.TOOL_IO:
+        paths = memo.input_files(tool_code, params)
+    else:
+        paths = [value for value in (params or {}).values() if isinstance(value, str)]
+    stamp = []
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            stamp.append((path, stat.st_mtime_ns, stat.st_size))
+    return stamp
+
+
+def tool_key(tool_code: str, params: dict) -> str:
+    return json.dumps([tool_code, params, input_stamp(tool_code, params)], sort_keys=True, default=str)
+
+
+parse_flight = SingleFlight()
+tool_flight = SingleFlight()
@@ -3,22 +3,23 @@ import os
 import json
 import re
 import glob
-import pandas as pd
 import datetime
-from bs4 import BeautifulSoup
-import markdown
-import httpx
-from PIL import Image
+import importlib
+import time
 from dotenv import load_dotenv
 import requests
 import sqlite3
 from pathlib import Path
 import base64
-from dateutil.parser import parse
-from scipy.spatial.distance import cosine
+
+import metrics
 
 load_dotenv()
 AIPROXY_TOKEN = os.getenv("AIPROXY_TOKEN")
+AIPROXY_URL = os.getenv("AIPROXY_URL", "http://aiproxy.sanand.workers.dev/openai/v1")
+
+# Passed to every requests call so upstream latency is recorded per host.
+UPSTREAM_HOOKS = {"response": metrics.observe_upstream}
 
 def ensure_data_path(path: str):
     if not path.startswith('/data'):
@@ -37,8 +38,8 @@ def get_embedding(text):
         "model": "text-embedding-3-small",
         "input": [text]
     }
-    response = requests.post("http://aiproxy.sanand.workers.dev/openai/v1/embeddings", 
-                           headers=headers, data=json.dumps(data))
+    response = requests.post(f"{AIPROXY_URL}/embeddings", 
+                           headers=headers, data=json.dumps(data), hooks=UPSTREAM_HOOKS)
     response.raise_for_status()
     return response.json()["data"][0]["embedding"]
 
@@ -88,6 +89,7 @@ def task_A3(params: dict):
     ensure_data_path(input_file)
     ensure_data_path(output_file)
     
+    from dateutil.parser import parse
     with open(input_file, 'r') as file:
         weekday_count = sum(1 for date in file if parse(date).weekday() == int(weekday)-1)
     
@@ -185,8 +187,8 @@ def task_A8(params: dict):
         "Authorization": f"Bearer {os.getenv('AIPROXY_TOKEN')}"
 
     }
-    response = requests.post("http://aiproxy.sanand.workers.dev/openai/v1/chat/completions",
-                             headers=headers, data=json.dumps(body))
+    response = requests.post(f"{AIPROXY_URL}/chat/completions",
+                             headers=headers, data=json.dumps(body), hooks=UPSTREAM_HOOKS)
     result = response.json()
     card_number = result['choices'][0]['message']['content'].replace(" ", "")
     with open(filename, 'w') as file:
@@ -198,6 +200,7 @@ def task_A9(params: dict):
     with open(filename, 'r') as f:
         comments = [line.strip() for line in f.readlines()]
     embeddings = [get_embedding(comment) for comment in comments]
+    from scipy.spatial.distance import cosine
     min_distance = float('inf')
     most_similar = (None, None)
     for i in range(len(comments)):
@@ -229,7 +232,7 @@ def task_B3(params: dict):
     output_path = params.get("output")
     api_url = params.get("api_url")
     ensure_data_path(output_path)
-    response = requests.get(api_url)
+    response = requests.get(api_url, hooks=UPSTREAM_HOOKS)
     response.raise_for_status()
     with open(output_path, "w") as f:
         json.dump(response.json(), f)
@@ -263,6 +266,7 @@ def task_B5(params: dict):
     ensure_data_path(db_path)
     ensure_data_path(output_path)
     
+    import pandas as pd
     conn = sqlite3.connect(db_path)
     result = pd.read_sql_query(query, conn)
     result.to_json(output_path)
@@ -277,7 +281,8 @@ def task_B6(params: dict):
     output_path = params.get("output")
     ensure_data_path(output_path)
     
-    response = requests.get(url)
+    from bs4 import BeautifulSoup
+    response = requests.get(url, hooks=UPSTREAM_HOOKS)
     soup = BeautifulSoup(response.text, 'html.parser')
     data = {"title": soup.title.string, "links": [a.get('href') for a in soup.find_all('a')]}
     
@@ -321,9 +326,10 @@ def task_B8(params: dict):
             'model': (None, 'whisper-1')
         }
         response = requests.post(
-            "http://aiproxy.sanand.workers.dev/openai/v1/audio/transcriptions",
+            f"{AIPROXY_URL}/audio/transcriptions",
             headers=headers,
-            files=files
+            files=files,
+            hooks=UPSTREAM_HOOKS
         )
         response.raise_for_status()
         transcription = response.json()["text"]
@@ -359,3 +365,41 @@ def task_B10(params: dict):
     df = pd.read_csv(csv_path)
     filtered_df = df[df[filter_column] == filter_value]
     return filtered_df.to_json(orient="records")
+
+# Heavy third-party modules each tool imports on first use. preload() imports them ahead
+# of time so the first request for a tool does not pay for it.
+TOOL_DEPS = {
+    "A3": ["dateutil.parser"],
+    "A9": ["scipy.spatial.distance"],
+    "B5": ["pandas"],
+    "B6": ["bs4"],
+    "B7": ["PIL.Image"],
+    "B9": ["markdown"],
+    "B10": ["pandas"],
+}
+
+def preload(tool_codes) -> dict:
+    """
+    Import the dependencies of the given tools. Returns the import time in seconds per tool.
+    """
+    timings = {}
+    for code in tool_codes:
+        start = time.perf_counter()
+        for module in TOOL_DEPS.get(code, []):
+            importlib.import_module(module)
+        timings[code] = time.perf_counter() - start
+    return timings
+
+# Files each deterministic tool reads and writes, resolved with the same defaults as the
+# task itself. Directory inputs are given as (directory, glob pattern).
+TOOL_IO = {
+    "A3": lambda p: ([p.get("filename", "/data/dates.txt")], [p.get("targetfile", "/data/dates-wednesdays.txt")]),
+    "A4": lambda p: ([p.get("filename", "/data/contacts.json")], [p.get("targetfile", "/data/contacts-sorted.json")]),
+    "A5": lambda p: ([(p.get("log_dir_path", "/data/logs"), "*.log")], [p.get("output_dir_path", "/data/logs-recent.txt")]),
+    "A6": lambda p: ([(p.get("doc_dir_path", "/data/docs"), "**/*.md")], [p.get("output_file_path", "/data/docs/index.json")]),
+    "A7": lambda p: ([p.get("filename", "/data/email.txt")], [p.get("output_file", "/data/email-sender.txt")]),
+    "A9": lambda p: ([p.get("filename", "/data/comments.txt")], [p.get("output_filename", "/data/comments-similar.txt")]),
+    "A10": lambda p: ([p.get("filename", "/data/ticket-sales.db")], [p.get("output_filename", "/data/ticket-sales-gold.txt")]),
+    "B9": lambda p: ([p.get("input")], [p.get("output")]),
+    "B10": lambda p: ([p.get("csv_path")], []),
+}
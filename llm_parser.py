@@ -1,13 +1,17 @@
-from openai import OpenAI
 import json
+import math
+import re
 import os
 import httpx
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+import metrics
+
 load_dotenv()
 
 
-openai_api_chat  = "http://aiproxy.sanand.workers.dev/openai/v1/chat/completions" # for testing
+openai_api_chat  = os.getenv("AIPROXY_URL", "http://aiproxy.sanand.workers.dev/openai/v1") + "/chat/completions" # for testing
 openai_api_key = os.getenv("AIPROXY_TOKEN")
 
 headers = {
@@ -363,32 +367,192 @@ Security and business rules:
 When given an input query, decide which function to call and output only the corresponding JSON.
 """
 
-def run_task(input_query: str, is_test: bool = False) -> dict:
-    with httpx.Client(timeout=20) as client:
+# Serialized once at import: {"type": "function", "function": ...} per tool, by name.
+TOOL_PAYLOADS = {function["name"]: json.dumps({"type": "function", "function": function}) for function in function_definitions_llm}
+ALL_TOOLS_JSON = "[" + ",".join(TOOL_PAYLOADS.values()) + "]"
+
+# "full" sends every tool schema; "compact" pre-filters the catalogue locally and sends
+# full schemas only for the ROUTING_CANDIDATES best matching tools.
+ROUTING_MODE = os.getenv("LLM_ROUTING", "full")
+ROUTING_CANDIDATES = int(os.getenv("LLM_ROUTING_CANDIDATES", 4))
+
+STOPWORDS = {
+    "the", "and", "for", "from", "into", "with", "that", "this", "are", "its", "all", "each",
+    "data", "file", "files", "path", "filename", "output", "input", "save", "saved", "specified",
+    "given", "string", "integer", "object", "array", "type", "optional",
+}
+
+def _tokens(text: str) -> set:
+    words = re.findall(r"[a-z0-9]+", text.lower().replace("_", " "))
+    # Crude stemming so "logs" matches "log" and "wednesdays" matches "wednesday".
+    return {word[:-1] if len(word) > 3 and word.endswith("s") else word for word in words if len(word) > 1 and word not in STOPWORDS}
+
+def _keywords(function: dict) -> set:
+    """
+    Words from the tool's description, parameter names, defaults and path patterns
+    (file extensions, weekday names and the like).
+    """
+    text = [function["description"]]
+    for name, spec in function.get("parameters", {}).get("properties", {}).items():
+        text += [name, str(spec.get("pattern", "")), str(spec.get("default", "")), spec.get("description", "")]
+    return _tokens(" ".join(text))
+
+# Compact name-and-description index with IDF weights, so words shared by many tools count for less.
+TOOL_INDEX = {function["name"]: _keywords(function) for function in function_definitions_llm}
+_document_frequency = {}
+for _words in TOOL_INDEX.values():
+    for _word in _words:
+        _document_frequency[_word] = _document_frequency.get(_word, 0) + 1
+KEYWORD_WEIGHTS = {word: math.log(1 + len(TOOL_INDEX) / df) for word, df in _document_frequency.items()}
+
+def candidate_tools(input_queries: list) -> list:
+    """
+    Names of the tools most likely to match any of the queries, best first. An empty list
+    means nothing matched and the full catalogue should be sent.
+    """
+    candidates = []
+    for query in input_queries:
+        words = _tokens(query)
+        scores = {name: sum(KEYWORD_WEIGHTS[word] for word in words & keywords) for name, keywords in TOOL_INDEX.items()}
+        ranked = [name for name in sorted(scores, key=scores.get, reverse=True) if scores[name] > 0]
+        if not ranked:
+            return []
+        candidates += [name for name in ranked[:ROUTING_CANDIDATES] if name not in candidates]
+    return candidates
+
+def select_tools(candidates: list, payloads: dict = TOOL_PAYLOADS, all_tools: str = ALL_TOOLS_JSON) -> str:
+    if candidates:
+        return "[" + ",".join(payloads[name] for name in candidates) + "]"
+    return all_tools
+
+def route(input_queries: list) -> list:
+    """
+    Candidate tools to offer for these queries, or an empty list for the full catalogue.
+    """
+    return candidate_tools(input_queries) if ROUTING_MODE == "compact" else []
+
+def request_body(messages: list, tools: str, **options) -> str:
+    """
+    Chat-completions request body with the pre-serialized tools spliced in.
+    """
+    body = {"model": "gpt-4o-mini", "messages": messages, **options}
+    return json.dumps(body)[:-1] + ',"tools":' + tools + "}"
+
+def _complete(messages: list, tools: str, timeout: float = 20, **options) -> dict:
+    with httpx.Client(timeout=timeout) as client:
         response = client.post(
             f"{openai_api_chat}",
             headers=headers,
-            json=
-                {
-                    "model": "gpt-4o-mini",
-                    "messages": [
-                                    {"role": "system", "content": "You are a function classifier that extracts structured parameters from queries."},
-                                    {"role": "user", "content": input_query}
-                                ],
-                    "tools": [
-                                {
-                                    "type": "function",
-                                    "function": function
-                                } for function in function_definitions_llm
-                            ],
-                    "tool_choice": "auto"
-                },
+            content=request_body(messages, tools, **options),
         )
-    # return response.json()
+    metrics.observe_upstream(response)
+    return response.json()
+
+def _calls_within(completion: dict, candidates: list) -> bool:
+    tool_calls = completion["choices"][0]["message"].get("tool_calls") or []
+    return bool(tool_calls) and all(call["function"]["name"] in candidates for call in tool_calls)
+
+def run_task(input_query: str, is_test: bool = False) -> dict:
+    messages = [
+        {"role": "system", "content": "You are a function classifier that extracts structured parameters from queries."},
+        {"role": "user", "content": input_query}
+    ]
+    candidates = route([input_query])
+    completion = _complete(messages, select_tools(candidates), tool_choice="auto")
+    if candidates and not _calls_within(completion, candidates):
+        # The pre-filter may have dropped the right tool; retry with the full catalogue.
+        completion = _complete(messages, ALL_TOOLS_JSON, tool_choice="auto")
     if is_test:
-        print(response.json())
-        return response.json()
+        print(completion)
+        return completion
     else:
-        print(response.json()["choices"][0]["message"]["tool_calls"][0]["function"])
-        return response.json()["choices"][0]["message"]["tool_calls"][0]["function"]
+        message = completion["choices"][0]["message"]
+        if not message.get("tool_calls"):
+            raise ValueError(message.get("content") or "No tool call returned.")
+        print(message["tool_calls"][0]["function"])
+        return message["tool_calls"][0]["function"]
+
+
+BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", 8))
+
+BATCH_PROMPT = (
+    "You are a function classifier that extracts structured parameters from queries. "
+    "The user message contains several numbered tasks. Call exactly one function per task "
+    "and set task_index to the number of the task it answers."
+)
+
+TASK_INDEX = "task_index"
+
+def _with_task_index(function: dict) -> dict:
+    parameters = function.get("parameters", {"type": "object", "properties": {}, "required": []})
+    return {
+        **function,
+        "parameters": {
+            **parameters,
+            "properties": {
+                **parameters.get("properties", {}),
+                TASK_INDEX: {"type": "integer", "minimum": 1, "description": "Number of the task this call answers."}
+            },
+            "required": [*parameters.get("required", []), TASK_INDEX]
+        }
+    }
+
+# Batch parses use the same tools with a required task_index, so every call can be
+# matched back to its task instead of relying on the order of the calls.
+BATCH_TOOL_PAYLOADS = {function["name"]: json.dumps({"type": "function", "function": _with_task_index(function)}) for function in function_definitions_llm}
+ALL_BATCH_TOOLS_JSON = "[" + ",".join(BATCH_TOOL_PAYLOADS.values()) + "]"
+
+def _parse_single(query: str):
+    try:
+        return run_task(query)
+    except Exception as e:
+        return e
+
+def _parse_chunk(queries: list) -> list:
+    packed = "\n".join(f"{i + 1}. {query}" for i, query in enumerate(queries))
+    candidates = route(queries)
+    try:
+        completion = _complete(
+            [
+                {"role": "system", "content": BATCH_PROMPT},
+                {"role": "user", "content": packed}
+            ],
+            select_tools(candidates, BATCH_TOOL_PAYLOADS, ALL_BATCH_TOOLS_JSON),
+            timeout=20 + 5 * len(queries),
+            # Forcing a call over a pre-filtered set would make the model pick a wrong tool.
+            tool_choice="auto" if candidates else "required",
+            parallel_tool_calls=True,
+        )
+        tool_calls = completion["choices"][0]["message"].get("tool_calls") or []
+    except Exception:
+        tool_calls = []
+
+    assigned = {}
+    for call in tool_calls:
+        function = call.get("function", {})
+        try:
+            arguments = function["arguments"]
+            arguments = json.loads(arguments) if isinstance(arguments, str) else dict(arguments)
+            index = int(arguments.pop(TASK_INDEX)) - 1
+        except (KeyError, TypeError, ValueError):
+            continue
+        if candidates and function.get("name") not in candidates:
+            continue
+        assigned.setdefault(index, []).append({"name": function.get("name"), "arguments": json.dumps(arguments)})
+    # Tasks without exactly one matching call are parsed on their own, which also retries
+    # with the full catalogue when compact routing missed the right tool.
+    return [
+        assigned[i][0] if len(assigned.get(i, [])) == 1 else _parse_single(query)
+        for i, query in enumerate(queries)
+    ]
 
+def run_tasks(input_queries: list, batch_size: int = BATCH_SIZE) -> list:
+    """
+    Parse many task descriptions, packing up to batch_size tasks into each LLM call.
+    Returns one entry per input query, in order: the parsed function, or the exception
+    raised while parsing that task.
+    """
+    chunks = [input_queries[start:start + batch_size] for start in range(0, len(input_queries), batch_size)]
+    with ThreadPoolExecutor(max_workers=max(1, min(len(chunks), 4))) as pool:
+        results = pool.map(lambda chunk: [_parse_single(chunk[0])] if len(chunk) == 1 else _parse_chunk(chunk), chunks)
+        return [parsed for chunk_result in results for parsed in chunk_result]
@@ -1,3 +1,5 @@
+import time
+_import_start = time.perf_counter()
 import os
 import json
 import glob
@@ -6,16 +8,46 @@ import sqlite3
 import re
 import requests
 import httpx
+import asyncio
+import threading
+from typing import List
+from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, Query, Response
-from fastapi.responses import PlainTextResponse, JSONResponse
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, JSONResponse, StreamingResponse, FileResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
 import functions
 import llm_parser
+import memo
+import metrics
+import profiling
+import coalesce
+from coalesce import parse_flight, tool_flight, tool_key
+
+STARTUP = {"import_seconds": time.perf_counter() - _import_start, "rss_bytes": metrics.current_rss()}
+PRELOAD_TOOLS = [code.strip() for code in os.getenv("PRELOAD_TOOLS", "").split(",") if code.strip()]
+
+def preload_tools():
+    codes = list(functions.TOOL_DEPS) if PRELOAD_TOOLS == ["all"] else PRELOAD_TOOLS
+    timings = functions.preload(codes)
+    STARTUP["preload_seconds"] = sum(timings.values())
+    STARTUP["preload_rss_bytes"] = metrics.current_rss()
+    print(f"Preloaded {', '.join(timings)} in {STARTUP['preload_seconds'] * 1000:.0f} ms, RSS {STARTUP['preload_rss_bytes'] / 2**20:.1f} MB")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print(f"Imported in {STARTUP['import_seconds'] * 1000:.0f} ms, RSS {STARTUP['rss_bytes'] / 2**20:.1f} MB")
+    if PRELOAD_TOOLS:
+        # Preload in the background so the server starts accepting requests right away.
+        threading.Thread(target=preload_tools, daemon=True).start()
+    yield
 
 app = FastAPI(
+    lifespan=lifespan,
     title="DataWorks Agent API",
     description=(
         "POST /run?task=<task description> executes a plain-English task. The agent parses the instruction, "
@@ -34,6 +66,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def timing_header(request: Request, call_next):
+    start = time.perf_counter()
+    timings = metrics.start_request()
+    response = await call_next(request)
+    response.headers["Server-Timing"] = metrics.server_timing(timings, time.perf_counter() - start)
+    return response
+
 TOOLS = {
     "A1": functions.task_A1,
     "A2": functions.task_A2,
@@ -60,31 +100,194 @@ def ask(task: str):
     result = llm_parser.run_task(task, True)
     return result
 
-@app.post("/run")
-async def run_task(task: str = Query(..., description="Plain-English task description")):
+class BatchRequest(BaseModel):
+    tasks: List[str]
+
+def parse_arguments(parsed: dict) -> dict:
+    arguments = parsed.get("arguments")
+    return json.loads(arguments) if isinstance(arguments, str) else arguments
+
+def _stat_files(paths) -> dict:
+    stats = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        if os.path.isfile(path):
+            stats[path] = (stat.st_mtime_ns, stat.st_size)
+    return stats
+
+@contextmanager
+def measured(tool_code: str, params: dict):
+    """
+    Record the bytes the tool read and wrote while the block runs. Tools in functions.TOOL_IO
+    use their declared files; for the rest, every argument naming a file counts as an input
+    if it is unchanged afterwards and as an output if it was created or modified. Set
+    io["read"] to False when the inputs were not actually read (a memo hit).
+    """
+    if tool_code in functions.TOOL_IO:
+        inputs = memo.input_files(tool_code, params)
+        outputs = [path for path in functions.TOOL_IO[tool_code](params or {})[1] if path]
+    else:
+        inputs = outputs = [value for value in (params or {}).values() if isinstance(value, str) and value.startswith("/")]
+    before = _stat_files(set(inputs) | set(outputs))
+    io = {"read": True}
     try:
-        parsed = llm_parser.run_task(task)
+        yield io
+    finally:
+        after = _stat_files(outputs)
+        written = {path: stat for path, stat in after.items() if before.get(path) != stat}
+        read = sum(stat[1] for path, stat in before.items() if path in inputs and path not in written) if io["read"] else 0
+        metrics.TOOL_BYTES_READ.observe(read, tool=tool_code)
+        metrics.TOOL_BYTES_WRITTEN.observe(sum(stat[1] for stat in written.values()), tool=tool_code)
+
+def execute_tool(tool_code: str, params: dict):
+    try:
+        with measured(tool_code, params) as io:
+            result, hit = memo.run(tool_code, params, TOOLS[tool_code])
+            io["read"] = not hit
+        return result
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Task parsing error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}")
+
+def profile_tool(tool_code: str, params: dict):
+    try:
+        with measured(tool_code, params):
+            return profiling.run(tool_code, TOOLS[tool_code], params)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}")
+
+async def dispatch(parsed: dict, profile: bool = False):
+    """
+    Run the parsed tool call and return (result, profile_id). Concurrent calls of the same
+    tool with identical arguments and unchanged input files share a single execution, and
+    deterministic tools whose inputs have not changed since their last run return the
+    memoized result. Profiled runs (requested or sampled) always execute the tool.
+    """
     tool_code = parsed.get("name")
-    params = json.loads(parsed.get("arguments")) if isinstance(parsed.get("arguments"), str) else parsed.get("arguments")
+    params = parse_arguments(parsed)
     if tool_code not in TOOLS:
         raise HTTPException(status_code=400, detail="Tool not supported.")
+    with metrics.stage(f"tool_{tool_code}", metrics.TOOL_SECONDS, tool=tool_code):
+        if profiling.should_profile(profile):
+            return await run_in_threadpool(profile_tool, tool_code, params)
+        # Building the key stats every input file (globs for A5/A6), so keep it off the event loop.
+        key = await run_in_threadpool(tool_key, tool_code, params) if coalesce.COALESCE_ENABLED else None
+        return await tool_flight.do(key, execute_tool, tool_code, params), None
+
+@app.post("/run")
+async def run_task(
+    task: str = Query(..., description="Plain-English task description"),
+    profile: bool = Query(False, description="Capture a CPU and memory profile of the tool execution"),
+):
     try:
-        result = TOOLS[tool_code](params)
-        return {"status": "ok", "result": result}
+        with metrics.stage("llm_parse", metrics.LLM_PARSE_SECONDS):
+            parsed = await parse_flight.do(task, llm_parser.run_task, task)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Task parsing error: {str(e)}")
+    result, profile_id = await dispatch(parsed, profile)
+    if profile_id:
+        return {"status": "ok", "result": result, "profile": profile_id}
+    return {"status": "ok", "result": result}
+
+@app.post("/run/batch")
+async def run_batch(batch: BatchRequest):
+    """
+    Parse and execute many tasks in one request. Identical task strings are parsed and
+    executed once. Results are streamed back as NDJSON, one line per task, as they finish.
+    """
+    indexes = {}
+    for index, task in enumerate(batch.tasks):
+        indexes.setdefault(task, []).append(index)
+    unique_tasks = list(indexes)
+    try:
+        with metrics.stage("llm_parse", metrics.LLM_PARSE_SECONDS):
+            parsed_tasks = await run_in_threadpool(llm_parser.run_tasks, unique_tasks)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Task parsing error: {str(e)}")
+
+    async def execute(task, parsed):
+        if isinstance(parsed, Exception):
+            return task, {"status": "error", "detail": f"Task parsing error: {str(parsed)}"}
+        try:
+            result, profile_id = await dispatch(parsed)
+            if profile_id:
+                return task, {"status": "ok", "result": result, "profile": profile_id}
+            return task, {"status": "ok", "result": result}
+        except HTTPException as he:
+            return task, {"status": "error", "detail": he.detail}
+        except Exception as e:
+            return task, {"status": "error", "detail": f"Agent error: {str(e)}"}
+
+    async def stream():
+        pending = [execute(task, parsed) for task, parsed in zip(unique_tasks, parsed_tasks)]
+        for finished in asyncio.as_completed(pending):
+            task, outcome = await finished
+            for index in indexes[task]:
+                yield json.dumps({"index": index, "task": task, **outcome}, default=str) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.get("/stats")
+async def stats():
+    return {"parse": parse_flight.stats(), "tools": tool_flight.stats(), "memo": memo.stats()}
+
+def not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+@app.get("/profiles")
+async def profiles():
+    return {"profiles": profiling.list_profiles()}
+
+@app.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, kind: str = Query("summary", description="summary, cpu (pstats) or memory (tracemalloc snapshot)")):
+    profile_path = profiling.find(profile_id, kind)
+    if profile_path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if kind == "summary":
+        return FileResponse(profile_path, media_type="text/plain; charset=utf-8")
+    return FileResponse(profile_path, media_type="application/octet-stream", filename=os.path.basename(profile_path))
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    memo_stats, parse_stats, tool_stats = memo.stats(), parse_flight.stats(), tool_flight.stats()
+    caches = {
+        "memo": {"hits": memo_stats["hits"], "misses": memo_stats["misses"]},
+        "parse_coalesce": {"hits": parse_stats["coalesced"], "misses": parse_stats["calls"]},
+        "tool_coalesce": {"hits": tool_stats["coalesced"], "misses": tool_stats["calls"]},
+    }
+    gauges = {f"dataworks_startup_{name}": value for name, value in STARTUP.items()}
+    gauges["dataworks_rss_bytes"] = metrics.current_rss()
+    return PlainTextResponse(metrics.render(caches, gauges), media_type="text/plain; version=0.0.4")
 
 @app.get("/read", response_class=PlainTextResponse)
-async def read_file(path: str = Query(..., description="Path to file inside /data")):
+async def read_file(request: Request, path: str = Query(..., description="Path to file inside /data")):
+    """
+    Streams the file from disk with conditional request support via ETag / Last-Modified.
+    Range requests, including If-Range and multi-range, are handled by FileResponse.
+    """
     try:
         functions.ensure_data_path(path)
-        if not os.path.exists(path):
+        if not os.path.isfile(path):
             raise HTTPException(status_code=404, detail="File not found")
-        with open(path, "r") as f:
-            content = f.read()
-        return content
+        stat = os.stat(path)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        headers = {"ETag": etag, "Last-Modified": formatdate(stat.st_mtime, usegmt=True)}
+        if not_modified(request, etag, stat.st_mtime):
+            return Response(status_code=304, headers=headers)
+        # FileResponse uses the server's zero-copy path (sendfile/pathsend) when available.
+        return FileResponse(path, media_type="text/plain; charset=utf-8", headers=headers, stat_result=stat)
     except HTTPException as he:
         raise he
     except Exception as e:
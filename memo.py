@@ -0,0 +1,204 @@
+import glob
+import hashlib
+import json
+import os
+import threading
+
+import functions
+
+# Kept outside /data so the store is neither readable through /read nor seen by the tools.
+# One JSON file per record, named after the sha256 of its key, so a run only writes its own record.
+MEMO_DIR = os.getenv("TOOL_MEMO_DIR", "/tmp/dataworks-tool-memo")
+MEMO_ENABLED = os.getenv("TOOL_MEMO", "1") != "0"
+MEMO_MAX_RECORDS = int(os.getenv("TOOL_MEMO_MAX_RECORDS", 1000))
+# Results larger than this (e.g. B10's filtered CSV) are not memoized.
+MEMO_MAX_RESULT_BYTES = int(os.getenv("TOOL_MEMO_MAX_RESULT_BYTES", 64 * 1024))
+
+_lock = threading.Lock()
+# Record digests in least to most recently used order, rebuilt from file mtimes on first use.
+_index = None
+hits = 0
+misses = 0
+
+
+def _record_path(digest: str) -> str:
+    return os.path.join(MEMO_DIR, f"{digest}.json")
+
+
+def _load_index() -> dict:
+    """
+    Must hold _lock.
+    """
+    global _index
+    if _index is None:
+        try:
+            entries = [entry for entry in os.scandir(MEMO_DIR) if entry.name.endswith(".json")]
+        except OSError:
+            entries = []
+        entries.sort(key=lambda entry: entry.stat().st_mtime_ns)
+        _index = dict.fromkeys(entry.name[:-len(".json")] for entry in entries)
+    return _index
+
+
+def _read(digest: str, key: str):
+    try:
+        with open(_record_path(digest), "r") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return record if record.get("key") == key else None
+
+
+def _touch(digest: str):
+    """
+    Mark a record as recently used, on disk too so the order survives a restart.
+    """
+    with _lock:
+        index = _load_index()
+        index.pop(digest, None)
+        index[digest] = None
+    try:
+        os.utime(_record_path(digest))
+    except OSError:
+        pass
+
+
+def _write(digest: str, record: dict):
+    """
+    Atomically write one record and evict the least recently used ones beyond MEMO_MAX_RECORDS.
+    """
+    path = _record_path(digest)
+    try:
+        os.makedirs(MEMO_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(record, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        return
+    with _lock:
+        index = _load_index()
+        index.pop(digest, None)
+        index[digest] = None
+        evicted = []
+        while len(index) > MEMO_MAX_RECORDS:
+            oldest = next(iter(index))
+            del index[oldest]
+            evicted.append(oldest)
+    for old in evicted:
+        try:
+            os.remove(_record_path(old))
+        except OSError:
+            pass
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def input_files(tool_code: str, params: dict) -> list:
+    """
+    Expand the declared inputs of a tool into the list of files it reads.
+    """
+    inputs, _ = functions.TOOL_IO[tool_code](params or {})
+    paths = []
+    for entry in inputs:
+        if isinstance(entry, tuple):
+            directory, pattern = entry
+            paths.extend(sorted(glob.glob(os.path.join(directory, pattern), recursive=True)))
+        elif entry:
+            paths.append(entry)
+    return paths
+
+
+def fingerprint(tool_code: str, params: dict, previous: dict = None) -> dict:
+    """
+    {path: [mtime, size, sha256]} for every input file. Files whose mtime and size match the
+    previous fingerprint are not re-hashed.
+    """
+    previous = previous or {}
+    result = {}
+    for path in input_files(tool_code, params):
+        if not os.path.isfile(path):
+            result[path] = None
+            continue
+        stat = os.stat(path)
+        old = previous.get(path)
+        if old and old[0] == stat.st_mtime_ns and old[1] == stat.st_size:
+            result[path] = old
+        else:
+            result[path] = [stat.st_mtime_ns, stat.st_size, _sha256(path)]
+    return result
+
+
+def _same_inputs(tool_code: str, params: dict, recorded: dict, current: dict) -> bool:
+    if recorded.keys() != current.keys():
+        return False
+    # A5 picks the most recent log files, so for directory inputs the mtimes are part of
+    # the result and a touched file counts as changed.
+    compare_mtime = any(isinstance(entry, tuple) for entry in functions.TOOL_IO[tool_code](params or {})[0])
+    for path, entry in current.items():
+        old = recorded[path]
+        if entry is None or old is None:
+            if entry != old:
+                return False
+        elif entry[1:] != old[1:] or (compare_mtime and entry[0] != old[0]):
+            return False
+    return True
+
+
+def _outputs_intact(outputs: dict) -> bool:
+    for path, (mtime, size) in outputs.items():
+        if not os.path.isfile(path):
+            return False
+        stat = os.stat(path)
+        if stat.st_mtime_ns != mtime or stat.st_size != size:
+            return False
+    return True
+
+
+def run(tool_code: str, params: dict, fn):
+    """
+    Call fn(params) unless the same tool already ran with the same arguments, its input
+    files are unchanged and its recorded outputs are still on disk; in that case use the
+    recorded result. Returns (result, hit).
+    """
+    global hits, misses
+    if not MEMO_ENABLED or tool_code not in functions.TOOL_IO:
+        return fn(params), False
+    key = json.dumps([tool_code, params], sort_keys=True, default=str)
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    record = _read(digest, key)
+    current = fingerprint(tool_code, params, record["inputs"] if record else None)
+    if record and _same_inputs(tool_code, params, record["inputs"], current) and _outputs_intact(record["outputs"]):
+        with _lock:
+            hits += 1
+        if current != record["inputs"]:
+            # Touched but unchanged inputs: keep the new mtimes so they are not re-hashed next time.
+            _write(digest, {**record, "inputs": current})
+        else:
+            _touch(digest)
+        return record["result"], True
+
+    with _lock:
+        misses += 1
+    result = fn(params)
+    _, outputs = functions.TOOL_IO[tool_code](params or {})
+    recorded_outputs = {}
+    for path in outputs:
+        if path and os.path.isfile(path):
+            stat = os.stat(path)
+            recorded_outputs[path] = [stat.st_mtime_ns, stat.st_size]
+    stored_result = result if isinstance(result, (str, int, float, bool, type(None))) else str(result)
+    if isinstance(stored_result, str) and len(stored_result) > MEMO_MAX_RESULT_BYTES:
+        return result, False
+    _write(digest, {"key": key, "inputs": current, "outputs": recorded_outputs, "result": stored_result})
+    return result, False
+
+
+def stats() -> dict:
+    return {"enabled": MEMO_ENABLED, "hits": hits, "misses": misses}
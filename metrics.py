@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from urllib.parse import urlparse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTE_BUCKETS = (1 << 10, 1 << 14, 1 << 17, 1 << 20, 1 << 23, 1 << 26, 1 << 29, 1 << 32)
+
+
+class Histogram:
+    """
+    Minimal Prometheus histogram with optional labels.
+    """
+
+    def __init__(self, name: str, help: str, buckets: tuple, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labelnames = labelnames
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self.lock:
+            counts, total = self.series.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect_left(self.buckets, value)] += 1
+            self.series[key] = (counts, total + value)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self.series.items()}
+        for key, (counts, total) in sorted(series.items()):
+            labels = [f'{name}="{value}"' for name, value in zip(self.labelnames, key)]
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                bucket_labels = ",".join(labels + [f'le="{bound}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = f"{{{','.join(labels)}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+LLM_PARSE_SECONDS = Histogram("dataworks_llm_parse_seconds", "Time spent parsing a task with the LLM.", LATENCY_BUCKETS)
+TOOL_SECONDS = Histogram("dataworks_tool_seconds", "Tool dispatch latency per tool code.", LATENCY_BUCKETS, ("tool",))
+UPSTREAM_SECONDS = Histogram("dataworks_upstream_http_seconds", "Upstream HTTP latency per host.", LATENCY_BUCKETS, ("host",))
+TOOL_BYTES_READ = Histogram("dataworks_tool_bytes_read", "Bytes of input files per tool dispatch.", BYTE_BUCKETS, ("tool",))
+TOOL_BYTES_WRITTEN = Histogram("dataworks_tool_bytes_written", "Bytes of output files created or modified per tool dispatch.", BYTE_BUCKETS, ("tool",))
+HISTOGRAMS = [LLM_PARSE_SECONDS, TOOL_SECONDS, UPSTREAM_SECONDS, TOOL_BYTES_READ, TOOL_BYTES_WRITTEN]
+
+_timings = ContextVar("timings", default=None)
+
+
+def start_request() -> list:
+    timings = []
+    _timings.set(timings)
+    return timings
+
+
+@contextmanager
+def stage(name: str, histogram: Histogram, **labels):
+    """
+    Time a block, record it in the histogram and in the current request's timing breakdown.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        histogram.observe(elapsed, **labels)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+def server_timing(timings: list, total: float) -> str:
+    entries = [f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in timings]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def observe_upstream(response, *args, **kwargs):
+    """
+    Record the latency of a finished requests/httpx response. Usable as a requests response hook.
+    """
+    host = urlparse(str(response.url)).hostname or ""
+    UPSTREAM_SECONDS.observe(response.elapsed.total_seconds(), host=host)
+    return response
+
+
+def current_rss() -> int:
+    """
+    Resident set size of this process in bytes, falling back to the peak RSS off Linux.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def render(caches: dict, gauges: dict = None) -> str:
+    """
+    Prometheus text format for every histogram plus cache counters and plain gauges. caches
+    maps a cache name to {"hits": n, "misses": n}.
+    """
+    lines = []
+    for name, value in (gauges or {}).items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    lines.append("# HELP dataworks_cache_requests_total Cache lookups by cache and result.")
+    lines.append("# TYPE dataworks_cache_requests_total counter")
+    for cache, counts in caches.items():
+        lines.append(f'dataworks_cache_requests_total{{cache="{cache}",result="hit"}} {counts["hits"]}')
+        lines.append(f'dataworks_cache_requests_total{{cache="{cache}",result="miss"}} {counts["misses"]}')
+    lines.append("# HELP dataworks_cache_hit_ratio Fraction of lookups served from the cache.")
+    lines.append("# TYPE dataworks_cache_hit_ratio gauge")
+    for cache, counts in caches.items():
+        lookups = counts["hits"] + counts["misses"]
+        lines.append(f'dataworks_cache_hit_ratio{{cache="{cache}"}} {counts["hits"] / lookups if lookups else 0}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,95 @@
+import cProfile
+import glob
+import io
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/dataworks-profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", 20))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+
+PROFILE_FILES = {"summary": "txt", "cpu": "prof", "memory": "tracemalloc"}
+PROFILE_ID = re.compile(r"^[\w-]+$")
+
+# tracemalloc is process-wide, so only one execution is profiled at a time.
+_lock = threading.Lock()
+
+
+def should_profile(requested: bool) -> bool:
+    return requested or (PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE)
+
+
+def run(tool_code: str, fn, params: dict):
+    """
+    Call fn(params) under cProfile and tracemalloc and store the results under PROFILE_DIR.
+    Returns (result, profile_id); profile_id is None if another profile was already running.
+    The memory snapshot covers the whole process, so allocations by concurrent requests show
+    up in it too.
+    """
+    if not _lock.acquire(blocking=False):
+        return fn(params), None
+    try:
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{tool_code}-{uuid.uuid4().hex[:8]}"
+        profiler = cProfile.Profile()
+        tracemalloc.start(25)
+        profiler.enable()
+        try:
+            result = fn(params)
+        finally:
+            profiler.disable()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            _save(profile_id, profiler, snapshot)
+        return result, profile_id
+    finally:
+        _lock.release()
+
+
+def _save(profile_id: str, profiler: cProfile.Profile, snapshot: tracemalloc.Snapshot):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profiler.dump_stats(path(profile_id, "cpu"))
+    snapshot.dump(path(profile_id, "memory"))
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(30)
+    summary.write("\nTop allocations:\n")
+    for stat in snapshot.statistics("lineno")[:20]:
+        summary.write(f"{stat}\n")
+    with open(path(profile_id, "summary"), "w") as f:
+        f.write(summary.getvalue())
+    _prune()
+
+
+def _prune():
+    profiles = sorted(glob.glob(os.path.join(PROFILE_DIR, "*.prof")), key=os.path.getmtime, reverse=True)
+    for stale in profiles[PROFILE_KEEP:]:
+        profile_id = os.path.basename(stale)[:-len(".prof")]
+        for kind in PROFILE_FILES:
+            try:
+                os.remove(path(profile_id, kind))
+            except OSError:
+                pass
+
+
+def path(profile_id: str, kind: str) -> str:
+    return os.path.join(PROFILE_DIR, f"{profile_id}.{PROFILE_FILES[kind]}")
+
+
+def list_profiles() -> list:
+    profiles = sorted(glob.glob(os.path.join(PROFILE_DIR, "*.prof")), key=os.path.getmtime, reverse=True)
+    return [os.path.basename(profile)[:-len(".prof")] for profile in profiles]
+
+
+def find(profile_id: str, kind: str):
+    """
+    Path of a stored profile file, or None if it does not exist.
+    """
+    if kind not in PROFILE_FILES or not PROFILE_ID.match(profile_id):
+        return None
+    profile_path = path(profile_id, kind)
+    return profile_path if os.path.isfile(profile_path) else None
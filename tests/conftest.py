@@ -0,0 +1,52 @@
+import datetime
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm_parser
+
+
+class FakeResponse:
+    def __init__(self, message: dict):
+        self.message = message
+        self.url = llm_parser.openai_api_chat
+        self.elapsed = datetime.timedelta(milliseconds=1)
+
+    def json(self):
+        return {"choices": [{"message": self.message}]}
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """
+    Replace the chat-completions call. Set fake_llm.respond to a function that takes the
+    request body and returns the assistant message; every body sent is kept in fake_llm.bodies.
+    """
+    class FakeClient:
+        bodies = []
+        respond = None
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def post(self, url, **kwargs):
+            body = json.loads(kwargs["content"])
+            FakeClient.bodies.append(body)
+            return FakeResponse(FakeClient.respond(body))
+
+    monkeypatch.setattr(llm_parser.httpx, "Client", FakeClient)
+    return FakeClient
+
+
+def tool_call(name: str, **arguments) -> dict:
+    return {"type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
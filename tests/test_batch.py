@@ -0,0 +1,73 @@
+import json
+
+from fastapi.testclient import TestClient
+
+import llm_parser
+import main
+from conftest import tool_call
+
+
+def single_parse(body: dict) -> dict:
+    task = body["messages"][-1]["content"]
+    if task.startswith("bad"):
+        return {"content": "Access outside /data is not allowed."}
+    return {"tool_calls": [tool_call("A7", filename=f"/data/{task}.txt")]}
+
+
+def test_batch_calls_are_matched_by_task_index(fake_llm):
+    def respond(body):
+        # Answer in reverse order; task_index must still route each call to its task.
+        return {"tool_calls": [
+            tool_call("A7", filename="/data/two.txt", task_index=2),
+            tool_call("A4", filename="/data/one.json", task_index=1),
+        ]}
+    fake_llm.respond = respond
+
+    parsed = llm_parser.run_tasks(["one", "two"])
+
+    assert [p["name"] for p in parsed] == ["A4", "A7"]
+    assert json.loads(parsed[0]["arguments"]) == {"filename": "/data/one.json"}
+    assert len(fake_llm.bodies) == 1
+
+
+def test_batch_tasks_without_exactly_one_call_are_parsed_alone(fake_llm):
+    def respond(body):
+        if "task_index" in body["messages"][0]["content"]:
+            return {"tool_calls": [
+                tool_call("A4", task_index=1),
+                tool_call("A5", task_index=1),
+                tool_call("A6", task_index=3),
+            ]}
+        return single_parse(body)
+    fake_llm.respond = respond
+
+    parsed = llm_parser.run_tasks(["one", "two", "three"])
+
+    assert [p["name"] for p in parsed] == ["A7", "A7", "A6"]
+    assert json.loads(parsed[1]["arguments"]) == {"filename": "/data/two.txt"}
+
+
+def test_batch_parse_failure_is_reported_per_task(fake_llm):
+    fake_llm.respond = lambda body: (
+        {"tool_calls": [tool_call("A7", task_index=1)]} if "task_index" in body["messages"][0]["content"] else single_parse(body)
+    )
+
+    parsed = llm_parser.run_tasks(["good", "bad"])
+
+    assert parsed[0]["name"] == "A7"
+    assert isinstance(parsed[1], ValueError)
+
+
+def test_batch_endpoint_streams_errors_for_failed_tasks_only(fake_llm, monkeypatch):
+    fake_llm.respond = lambda body: (
+        {"tool_calls": [tool_call("T1", task_index=1)]} if "task_index" in body["messages"][0]["content"] else single_parse(body)
+    )
+    monkeypatch.setitem(main.TOOLS, "T1", lambda params: "done")
+
+    response = TestClient(main.app).post("/run/batch", json={"tasks": ["good", "bad", "good"]})
+
+    assert response.status_code == 200
+    lines = sorted((json.loads(line) for line in response.text.splitlines()), key=lambda line: line["index"])
+    assert [line["status"] for line in lines] == ["ok", "error", "ok"]
+    assert lines[0]["result"] == "done"
+    assert lines[1]["detail"].startswith("Task parsing error")
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+
+import pytest
+
+import coalesce
+from coalesce import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def work(value):
+        calls.append(value)
+        release.wait(5)
+        return value * 2
+
+    async def scenario():
+        waiters = [asyncio.create_task(flight.do("key", work, 21)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(scenario()) == [42, 42, 42]
+    assert calls == [21]
+    assert flight.stats() == {"calls": 1, "coalesced": 2, "inflight": 0}
+
+
+def test_cancelling_the_leader_does_not_cancel_followers():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def work():
+        release.wait(5)
+        return "result"
+
+    async def scenario():
+        leader = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        await asyncio.sleep(0.01)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "result"
+
+
+def test_errors_are_shared_and_the_key_is_released():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    async def scenario():
+        results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+        await asyncio.sleep(0)
+        return results
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.stats()["inflight"] == 0
+
+
+def test_disabled_coalescing_runs_every_call(monkeypatch):
+    monkeypatch.setattr(coalesce, "COALESCE_ENABLED", False)
+    flight = SingleFlight()
+    calls = []
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("key", calls.append, i) for i in range(3)))
+
+    asyncio.run(scenario())
+    assert sorted(calls) == [0, 1, 2]
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_dispatch_skips_the_key_when_coalescing_is_off(monkeypatch):
+    import main
+    monkeypatch.setattr(coalesce, "COALESCE_ENABLED", False)
+    monkeypatch.setattr(main, "tool_key", lambda *args: pytest.fail("key built with coalescing off"))
+    monkeypatch.setitem(main.TOOLS, "T3", lambda params: params["value"])
+
+    result = asyncio.run(main.dispatch({"name": "T3", "arguments": {"value": 7}}))
+
+    assert result == (7, None)
+
+
+def test_dispatch_builds_the_key_off_the_event_loop(monkeypatch):
+    import main
+    loop_threads = []
+
+    def key(tool_code, params):
+        loop_threads.append(threading.current_thread())
+        return "key"
+    monkeypatch.setattr(coalesce, "COALESCE_ENABLED", True)
+    monkeypatch.setattr(main, "tool_key", key)
+    monkeypatch.setitem(main.TOOLS, "T3", lambda params: params["value"])
+
+    assert asyncio.run(main.dispatch({"name": "T3", "arguments": {"value": 7}})) == (7, None)
+    assert loop_threads and loop_threads[0] is not threading.main_thread()
@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+import functions
+import memo
+
+
+@pytest.fixture
+def tool(tmp_path, monkeypatch):
+    """
+    A memoized tool "T1" that copies in.txt to out.txt in tmp_path. tool.calls counts real runs.
+    """
+    monkeypatch.setattr(memo, "MEMO_DIR", str(tmp_path / "store"))
+    monkeypatch.setattr(memo, "MEMO_ENABLED", True)
+    monkeypatch.setattr(memo, "_index", None)
+    source, target = tmp_path / "in.txt", tmp_path / "out.txt"
+    source.write_text("hello")
+    monkeypatch.setitem(functions.TOOL_IO, "T1", lambda params: ([str(source)], [str(target)]))
+
+    class Tool:
+        calls = 0
+        params = {"size": 1}
+
+        @staticmethod
+        def run(params):
+            Tool.calls += 1
+            target.write_text(source.read_text())
+            return f"copied {source.read_text()}"
+
+    Tool.source, Tool.target = source, target
+    return Tool
+
+
+def test_unchanged_inputs_are_a_hit(tool):
+    assert memo.run("T1", tool.params, tool.run) == ("copied hello", False)
+    assert memo.run("T1", tool.params, tool.run) == ("copied hello", True)
+    assert tool.calls == 1
+
+
+def test_changed_input_or_arguments_rerun(tool):
+    memo.run("T1", tool.params, tool.run)
+    tool.source.write_text("changed content")
+    assert memo.run("T1", tool.params, tool.run) == ("copied changed content", False)
+    memo.run("T1", {"size": 2}, tool.run)
+    assert tool.calls == 3
+
+
+def test_missing_output_reruns(tool):
+    memo.run("T1", tool.params, tool.run)
+    os.remove(tool.target)
+    memo.run("T1", tool.params, tool.run)
+    assert tool.calls == 2
+
+
+def test_touched_input_is_rehashed_once(tool, monkeypatch):
+    memo.run("T1", tool.params, tool.run)
+    stat = os.stat(tool.source)
+    os.utime(tool.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    hashed = []
+    original = memo._sha256
+    monkeypatch.setattr(memo, "_sha256", lambda path: hashed.append(path) or original(path))
+
+    for _ in range(3):
+        memo.run("T1", tool.params, tool.run)
+
+    assert tool.calls == 1
+    assert hashed == [str(tool.source)]
+
+
+def test_store_is_persisted_and_bounded(tool, monkeypatch):
+    monkeypatch.setattr(memo, "MEMO_MAX_RECORDS", 2)
+    for size in range(4):
+        memo.run("T1", {"size": size}, tool.run)
+
+    monkeypatch.setattr(memo, "_index", None)
+    assert len(os.listdir(memo.MEMO_DIR)) == 2
+    assert len(memo._load_index()) == 2
+    memo.run("T1", {"size": 3}, tool.run)
+    memo.run("T1", {"size": 0}, tool.run)
+    assert tool.calls == 5
+
+
+def test_large_results_are_not_memoized(tool, monkeypatch):
+    monkeypatch.setattr(memo, "MEMO_MAX_RESULT_BYTES", 5)
+    memo.run("T1", tool.params, tool.run)
+    memo.run("T1", tool.params, tool.run)
+    assert tool.calls == 2
+    assert not os.path.exists(memo.MEMO_DIR)
+
+
+def test_a_run_writes_only_its_own_record(tool, monkeypatch):
+    memo.run("T1", {"size": 0}, tool.run)
+    first = os.path.join(memo.MEMO_DIR, os.listdir(memo.MEMO_DIR)[0])
+    mtime = os.stat(first).st_mtime_ns
+    os.utime(first, ns=(mtime - 10**9, mtime - 10**9))
+
+    memo.run("T1", {"size": 1}, tool.run)
+
+    assert len(os.listdir(memo.MEMO_DIR)) == 2
+    assert os.stat(first).st_mtime_ns == mtime - 10**9
@@ -0,0 +1,94 @@
+import http.server
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+import functions
+import main
+import memo
+import metrics
+from conftest import tool_call
+
+
+def test_run_records_bytes_for_tools_without_declared_files(fake_llm, monkeypatch, tmp_path):
+    source, target = tmp_path / "in.txt", tmp_path / "out.txt"
+    source.write_text("x" * 100)
+    fake_llm.respond = lambda body: {"tool_calls": [tool_call("T2", input=str(source), output=str(target))]}
+
+    def copy_twice(params):
+        with open(params["output"], "w") as f:
+            f.write(open(params["input"]).read() * 2)
+        return "ok"
+    monkeypatch.setitem(main.TOOLS, "T2", copy_twice)
+
+    response = TestClient(main.app).post("/run", params={"task": "copy the file twice"})
+
+    assert response.status_code == 200
+    assert "llm_parse;dur=" in response.headers["server-timing"]
+    _, read_total = metrics.TOOL_BYTES_READ.series[("T2",)]
+    _, written_total = metrics.TOOL_BYTES_WRITTEN.series[("T2",)]
+    assert (read_total, written_total) == (100, 200)
+    assert 'dataworks_tool_seconds_count{tool="T2"} 1' in TestClient(main.app).get("/metrics").text
+
+
+def test_memo_hits_record_no_bytes_read(monkeypatch, tmp_path):
+    source, target = tmp_path / "in.txt", tmp_path / "out.txt"
+    source.write_text("x" * 100)
+    monkeypatch.setattr(memo, "MEMO_DIR", str(tmp_path / "memo"))
+    monkeypatch.setattr(memo, "MEMO_ENABLED", True)
+    monkeypatch.setattr(memo, "_index", None)
+    monkeypatch.setitem(functions.TOOL_IO, "T4", lambda params: ([str(source)], [str(target)]))
+    monkeypatch.setitem(main.TOOLS, "T4", lambda params: target.write_text(source.read_text()) and "ok")
+
+    main.execute_tool("T4", {})
+    main.execute_tool("T4", {})
+
+    counts, read_total = metrics.TOOL_BYTES_READ.series[("T4",)]
+    assert (sum(counts), read_total) == (2, 100)
+
+
+def test_startup_preloads_configured_tools(monkeypatch):
+    loaded = []
+    monkeypatch.setattr(main, "PRELOAD_TOOLS", ["A3"])
+    monkeypatch.setattr(main, "STARTUP", dict(main.STARTUP))
+    monkeypatch.setattr(main.functions, "preload", lambda codes: loaded.extend(codes) or {code: 0.0 for code in codes})
+
+    with TestClient(main.app) as client:
+        for _ in range(100):
+            if "preload_seconds" in main.STARTUP:
+                break
+            time.sleep(0.01)
+        text = client.get("/metrics").text
+
+    assert loaded == ["A3"]
+    assert "dataworks_startup_import_seconds" in text
+    assert "dataworks_startup_preload_seconds" in text
+
+
+def test_upstream_calls_record_latency_without_sharing_cookies(monkeypatch, tmp_path):
+    cookies = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            cookies.append(self.headers.get("Cookie"))
+            self.send_response(200)
+            self.send_header("Set-Cookie", "session=abc")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(functions, "ensure_data_path", lambda path: None)
+    try:
+        for _ in range(2):
+            functions.task_B3({"api_url": f"http://127.0.0.1:{server.server_port}/api", "output": str(tmp_path / "api.json")})
+    finally:
+        server.shutdown()
+
+    assert cookies == [None, None]
+    counts, _ = metrics.UPSTREAM_SECONDS.series[("127.0.0.1",)]
+    assert sum(counts) >= 2
@@ -0,0 +1,84 @@
+import pstats
+import time
+import tracemalloc
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import profiling
+from conftest import tool_call
+
+
+@pytest.fixture
+def client(fake_llm, monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path / "profiles"))
+    monkeypatch.setitem(main.TOOLS, "T5", lambda params: sum(range(params["n"])))
+    fake_llm.respond = lambda body: {"tool_calls": [tool_call("T5", n=1000)]}
+    return TestClient(main.app)
+
+
+def test_profiled_run_is_listed_and_downloadable(client, tmp_path):
+    response = client.post("/run", params={"task": "sum the numbers", "profile": "true"})
+    assert response.status_code == 200
+    assert response.json()["result"] == sum(range(1000))
+    profile_id = response.json()["profile"]
+
+    assert client.get("/profiles").json() == {"profiles": [profile_id]}
+
+    summary = client.get(f"/profiles/{profile_id}")
+    assert summary.status_code == 200
+    assert summary.headers["content-type"].startswith("text/plain")
+    assert "Top allocations:" in summary.text
+
+    cpu = client.get(f"/profiles/{profile_id}", params={"kind": "cpu"})
+    assert cpu.status_code == 200
+    cpu_path = tmp_path / "cpu.prof"
+    cpu_path.write_bytes(cpu.content)
+    assert pstats.Stats(str(cpu_path)).total_calls > 0
+
+    memory = client.get(f"/profiles/{profile_id}", params={"kind": "memory"})
+    assert memory.status_code == 200
+    memory_path = tmp_path / "memory.tracemalloc"
+    memory_path.write_bytes(memory.content)
+    assert tracemalloc.Snapshot.load(str(memory_path))
+
+
+def test_unprofiled_run_has_no_profile(client):
+    response = client.post("/run", params={"task": "sum the numbers"})
+    assert response.status_code == 200
+    assert "profile" not in response.json()
+    assert client.get("/profiles").json() == {"profiles": []}
+
+
+@pytest.mark.parametrize("profile_id, kind", [
+    ("missing", "summary"),
+    ("{profile_id}", "source"),
+    ("..{profile_id}", "summary"),
+    ("{profile_id}.txt", "summary"),
+])
+def test_unknown_profiles_are_404(client, profile_id, kind):
+    existing = client.post("/run", params={"task": "sum the numbers", "profile": "true"}).json()["profile"]
+    response = client.get(f"/profiles/{profile_id.format(profile_id=existing)}", params={"kind": kind})
+    assert response.status_code == 404
+
+
+def test_old_profiles_are_pruned(client, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_KEEP", 2)
+    profile_ids = []
+    for _ in range(3):
+        profile_ids.append(client.post("/run", params={"task": "sum the numbers", "profile": "true"}).json()["profile"])
+        time.sleep(0.01)
+
+    assert client.get("/profiles").json() == {"profiles": profile_ids[:0:-1]}
+    assert client.get(f"/profiles/{profile_ids[0]}").status_code == 404
+
+
+def test_busy_profiler_runs_the_tool_unprofiled(client):
+    with profiling._lock:
+        response = client.post("/run", params={"task": "sum the numbers", "profile": "true"})
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok", "result": sum(range(1000))}
+    with profiling._lock:
+        assert profiling.run("T5", main.TOOLS["T5"], {"n": 10}) == (45, None)
@@ -0,0 +1,92 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import functions
+import main
+
+CONTENT = b"0123456789abcdef"
+
+
+@pytest.fixture
+def data_file(tmp_path, monkeypatch):
+    # /read only serves paths under /data; serve tmp_path instead.
+    allowed = functions.ensure_data_path
+    monkeypatch.setattr(functions, "ensure_data_path", lambda path: None if path.startswith(str(tmp_path)) else allowed(path))
+    path = tmp_path / "file.txt"
+    path.write_bytes(CONTENT)
+    return str(path)
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+def read(client, path, **headers):
+    return client.get("/read", params={"path": path}, headers=headers)
+
+
+def test_full_read_sends_validators(client, data_file):
+    response = read(client, data_file)
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["etag"]
+    assert response.headers["last-modified"]
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+def test_missing_file_is_404(client, data_file):
+    assert read(client, data_file + ".missing").status_code == 404
+
+
+def test_matching_etag_or_date_returns_304(client, data_file):
+    first = read(client, data_file)
+    by_etag = read(client, data_file, **{"If-None-Match": first.headers["etag"]})
+    by_date = read(client, data_file, **{"If-Modified-Since": first.headers["last-modified"]})
+    assert (by_etag.status_code, by_etag.content) == (304, b"")
+    assert (by_date.status_code, by_date.content) == (304, b"")
+
+
+def test_changed_file_gets_a_new_etag(client, data_file):
+    etag = read(client, data_file).headers["etag"]
+    with open(data_file, "ab") as f:
+        f.write(b"more")
+    response = read(client, data_file, **{"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.parametrize("header, body, content_range", [
+    ("bytes=2-5", CONTENT[2:6], "bytes 2-5/16"),
+    ("bytes=10-", CONTENT[10:], "bytes 10-15/16"),
+    ("bytes=-4", CONTENT[-4:], "bytes 12-15/16"),
+    ("bytes=14-100", CONTENT[14:], "bytes 14-15/16"),
+])
+def test_single_ranges(client, data_file, header, body, content_range):
+    response = read(client, data_file, Range=header)
+    assert response.status_code == 206
+    assert response.content == body
+    assert response.headers["content-range"] == content_range
+    assert response.headers["content-length"] == str(len(body))
+
+
+def test_unsatisfiable_range_is_416(client, data_file):
+    response = read(client, data_file, Range="bytes=16-20")
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */16"
+
+
+def test_malformed_range_is_400(client, data_file):
+    assert read(client, data_file, Range="bytes=5-3").status_code == 400
+
+
+def test_stale_if_range_sends_the_whole_file(client, data_file):
+    response = read(client, data_file, Range="bytes=0-3", **{"If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+def test_multi_range_is_served_as_multipart(client, data_file):
+    response = read(client, data_file, Range="bytes=0-1,4-5")
+    assert response.status_code == 206
+    assert response.headers["content-type"].startswith("multipart/byteranges")
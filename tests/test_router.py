@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+import llm_parser
+from conftest import tool_call
+
+
+def offered(body: dict) -> list:
+    return [tool["function"]["name"] for tool in body["tools"]]
+
+
+@pytest.fixture
+def compact(monkeypatch):
+    monkeypatch.setattr(llm_parser, "ROUTING_MODE", "compact")
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Count the number of Wednesdays in /data/dates.txt and write it to /data/dates-wednesdays.txt", "A3"),
+    ("Sort the contacts in /data/contacts.json by last_name, then first_name", "A4"),
+    ("Write the first line of the 10 most recent .log files in /data/logs/ to /data/logs-recent.txt", "A5"),
+    ("What is the total sales of all Gold tickets in /data/ticket-sales.db?", "A10"),
+    ("Transcribe the audio in /data/song.mp3", "B8"),
+    ("Filter /data/people.csv where city is Paris and return JSON", "B10"),
+])
+def test_candidates_rank_the_matching_tool_first(query, expected):
+    assert llm_parser.candidate_tools([query])[0] == expected
+
+
+def test_candidates_are_capped_and_empty_when_nothing_matches():
+    assert len(llm_parser.candidate_tools(["Sort /data/contacts.json"])) <= llm_parser.ROUTING_CANDIDATES
+    assert llm_parser.candidate_tools(["zzz qqq"]) == []
+
+
+def test_request_body_splices_only_candidate_schemas():
+    body = json.loads(llm_parser.request_body([{"role": "user", "content": "x"}], llm_parser.select_tools(["A4", "B10"]), tool_choice="auto"))
+    assert offered(body) == ["A4", "B10"]
+    assert body["tool_choice"] == "auto"
+    assert len(json.loads(llm_parser.select_tools([]))) == len(llm_parser.function_definitions_llm)
+
+
+def test_compact_routing_retries_with_full_catalogue_when_tool_was_dropped(fake_llm, compact):
+    query = "Fetch data from an API and save it to /data/api.json"
+    assert "B3" not in llm_parser.candidate_tools([query])
+    fake_llm.respond = lambda body: (
+        {"tool_calls": [tool_call("B3", api_url="https://example.com", output="/data/api.json")]}
+        if "B3" in offered(body) else {"content": "None of these tools fit."}
+    )
+
+    assert llm_parser.run_task(query)["name"] == "B3"
+    assert len(fake_llm.bodies) == 2
+    assert len(offered(fake_llm.bodies[1])) == len(llm_parser.function_definitions_llm)
+
+
+def test_compact_routing_retries_when_model_calls_a_tool_it_was_not_offered(fake_llm, compact):
+    # B4 is never in the catalogue, so calling it means the model went outside the candidates.
+    fake_llm.respond = lambda body: {"tool_calls": [tool_call("B4" if len(offered(body)) < len(llm_parser.function_definitions_llm) else "A4")]}
+
+    assert llm_parser.run_task("Sort /data/contacts.json by last name")["name"] == "A4"
+    assert len(fake_llm.bodies) == 2
+
+
+def test_compact_batch_does_not_force_a_call(fake_llm, compact):
+    def respond(body):
+        if "task_index" in body["messages"][0]["content"]:
+            return {"tool_calls": [tool_call("A4", task_index=1)]}
+        return {"tool_calls": [tool_call("B3")]} if "B3" in offered(body) else {"content": "No fit."}
+    fake_llm.respond = respond
+
+    parsed = llm_parser.run_tasks(["Sort /data/contacts.json by last name", "Fetch data from an API and save it to /data/api.json"])
+
+    assert fake_llm.bodies[0]["tool_choice"] == "auto"
+    assert [p["name"] for p in parsed] == ["A4", "B3"]